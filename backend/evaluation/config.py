@@ -16,8 +16,18 @@ PINECONE_REGION = os.getenv("PINECONE_REGION", "us-east-1")
 EVAL_STORE_PATH = os.getenv("EVAL_STORE_PATH", "./eval_results.db")
 NODE_BACKEND_URL = os.getenv("NODE_BACKEND_URL", "http://localhost:3001")
 EVAL_SERVICE_PORT = int(os.getenv("EVAL_SERVICE_PORT", "8000"))
+EVAL_SERVICE_WORKERS = int(os.getenv("EVAL_SERVICE_WORKERS", "1"))
+EVAL_THREADPOOL_SIZE = int(os.getenv("EVAL_THREADPOOL_SIZE", "200"))
+EVAL_BATCH_CONCURRENCY = int(os.getenv("EVAL_BATCH_CONCURRENCY", "8"))
+EVAL_HISTORY_MAX = int(os.getenv("EVAL_HISTORY_MAX", "100000"))
+METRICS_CACHE_TTL = int(os.getenv("METRICS_CACHE_TTL", "60"))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "30"))
+JUDGE_CACHE_PATH = os.getenv("JUDGE_CACHE_PATH", "./judge_cache.db")
+JUDGE_CACHE_TTL = int(os.getenv("JUDGE_CACHE_TTL", str(7 * 24 * 3600)))
+EVAL_COMBINED_JUDGE = os.getenv("EVAL_COMBINED_JUDGE", "false").lower() == "true"
 
 EMBEDDING_MODEL = "multilingual-e5-large"
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
 EMBEDDING_FIELD_MAP = {"text": "text"}
 
 NAMESPACES = [
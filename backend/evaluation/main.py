@@ -1,13 +1,19 @@
 """FastAPI evaluation service — Pinecone + TruLens + RAGAS + DeepEval + BrainTrust + Qdrant + Mem0 + Letta."""
 
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
-from config import EVAL_SERVICE_PORT
+from config import EVAL_SERVICE_PORT, EVAL_SERVICE_WORKERS, EVAL_THREADPOOL_SIZE
 from services.pinecone_service import get_pinecone_service
-from routers.ingest import router as ingest_router
+from services.trulens_evaluator import _get_provider as get_trulens_provider
+from routers.ingest import router as ingest_router, close_node_client
 from routers.search import router as search_router
 from routers.evaluate import router as evaluate_router
 from routers.dashboard import router as dashboard_router
@@ -23,11 +29,24 @@ from routers.phoenix import router as phoenix_router
 async def lifespan(app: FastAPI):
     """Startup / shutdown."""
     print("[EvalService] Starting up...")
+
+    # Pinecone, evaluator and LLM SDK calls are blocking and fan out through
+    # threads — size both the anyio pool (sync routes) and the loop's default
+    # executor (asyncio.to_thread) so they can actually run in parallel.
+    anyio.to_thread.current_default_thread_limiter().total_tokens = EVAL_THREADPOOL_SIZE
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=EVAL_THREADPOOL_SIZE))
+
     try:
         get_pinecone_service()
     except Exception as e:
         print(f"[EvalService] Pinecone init failed (will retry on first request): {e}")
 
+    # Build the TruLens judge provider up front so the first evaluation doesn't pay for it
+    try:
+        await asyncio.to_thread(get_trulens_provider)
+    except Exception as e:
+        print(f"[EvalService] TruLens provider init failed (will retry on first request): {e}")
+
     # Initialize Qdrant if configured
     vector_backend = os.getenv("VECTOR_BACKEND", "pinecone").lower()
     if vector_backend == "qdrant":
@@ -87,6 +106,7 @@ async def lifespan(app: FastAPI):
 
     yield
     print("[EvalService] Shutting down...")
+    await close_node_client()
 
 
 app = FastAPI(
@@ -101,6 +121,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Metrics history / evaluation lists can be large JSON arrays; small bodies skip compression
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 app.include_router(ingest_router)
 app.include_router(search_router)
@@ -121,4 +143,17 @@ async def health():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=EVAL_SERVICE_PORT, reload=True)
+    # TruLens evaluations persist in SQLite, but the running metric totals, the
+    # recent-page cache and the DeepEval history are per process, so workers
+    # default to 1. uvicorn ignores `workers` under reload, so reload only for
+    # a single worker.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=EVAL_SERVICE_PORT,
+        # "auto" picks uvloop / httptools when installed, asyncio / h11 otherwise
+        loop="auto",
+        http="auto",
+        workers=EVAL_SERVICE_WORKERS,
+        reload=EVAL_SERVICE_WORKERS == 1,
+    )
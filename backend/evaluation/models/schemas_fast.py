@@ -0,0 +1,108 @@
+"""msgspec mirrors of hot-path request schemas.
+
+The pydantic models in schemas.py remain the documented API; these structs
+decode large ingest / batch-evaluate bodies without per-item validation.
+"""
+
+from __future__ import annotations
+import re
+
+import msgspec
+from pydantic import BaseModel
+
+_ERROR_PATH = re.compile(r" - at `\$(.*)`$")
+_PATH_PART = re.compile(r"\.([^.\[]+)|\[(\d+)\]")
+_MISSING_FIELD = re.compile(r"^Object missing required field `(.+)`$")
+
+
+def openapi_request_body(model: type[BaseModel]) -> dict:
+    """openapi_extra documenting `model` as the body of a route that decodes it by hand."""
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+
+    def inline(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return inline(defs[node["$ref"].rsplit("/", 1)[-1]])
+            return {k: inline(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [inline(v) for v in node]
+        return node
+
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": inline(schema)}}}}
+
+
+def decode_error_detail(e: msgspec.DecodeError) -> list[dict]:
+    """422 detail for a msgspec decode error, shaped like FastAPI's pydantic errors."""
+    msg = str(e)
+    loc: list[str | int] = ["body"]
+    at = _ERROR_PATH.search(msg)
+    if at:
+        msg = msg[:at.start()]
+        loc += [key or int(index) for key, index in _PATH_PART.findall(at.group(1))]
+    if not isinstance(e, msgspec.ValidationError):
+        error_type = "json_invalid"
+    elif missing := _MISSING_FIELD.match(msg):
+        loc.append(missing.group(1))
+        error_type = "missing"
+    else:
+        error_type = "value_error"
+    return [{"loc": loc, "msg": msg, "type": error_type}]
+
+
+# ── Ingest ────────────────────────────────────────────────────────────────────
+
+class IngestRecordStruct(
+    msgspec.Struct,
+    rename={
+        "id": "_id", "risk_score": "riskScore", "seller_id": "sellerId",
+        # Field-name spellings IngestRecord accepts via populate_by_name
+        "id_by_name": "id", "risk_score_by_name": "risk_score", "seller_id_by_name": "seller_id",
+    },
+    omit_defaults=True,
+):
+    text: str
+    id: str | None = None
+    category: str | None = None
+    domain: str | None = None
+    outcome: str | None = None
+    risk_score: float | None = None
+    seller_id: str | None = None
+    country: str | None = None
+    timestamp: str | None = None
+    source: str | None = None
+    id_by_name: str | None = None
+    risk_score_by_name: float | None = None
+    seller_id_by_name: str | None = None
+
+    def __post_init__(self):
+        # Fold field-name spellings into the aliased fields (the alias wins, as
+        # in pydantic) and clear them so they are omitted on re-encode.
+        if self.id is None:
+            self.id = self.id_by_name
+        if self.risk_score is None:
+            self.risk_score = self.risk_score_by_name
+        if self.seller_id is None:
+            self.seller_id = self.seller_id_by_name
+        self.id_by_name = self.risk_score_by_name = self.seller_id_by_name = None
+
+
+class IngestRequestStruct(msgspec.Struct):
+    namespace: str
+    records: list[IngestRecordStruct]
+
+
+# ── Evaluate ──────────────────────────────────────────────────────────────────
+
+class EvaluateRequestStruct(msgspec.Struct):
+    query: str
+    retrieved_contexts: list[str]
+    agent_response: str
+    use_case: str
+    agent_id: str
+    ground_truth: str | None = None
+    metadata: dict = {}
+
+
+class BatchEvaluateRequestStruct(msgspec.Struct):
+    evaluations: list[EvaluateRequestStruct]
@@ -1,13 +1,46 @@
 """Dashboard router — aggregated metrics and evaluation history."""
 
+import threading
+
+import orjson
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
 from fastapi import APIRouter, Query
-from services.trulens_evaluator import get_aggregate_metrics, get_evaluations
+from fastapi.responses import StreamingResponse
+
+from config import METRICS_CACHE_TTL
+from services.trulens_evaluator import get_aggregate_metrics, get_evaluations, get_leaderboard_aggregates
 
+# Routes declare a return type so FastAPI serializes straight to JSON bytes in
+# pydantic-core instead of running jsonable_encoder
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
+# Dashboards poll these aggregates every few seconds — serve them from a short
+# TTL cache that is also cleared whenever a new evaluation is recorded.
+_metrics_cache = TTLCache(maxsize=16, ttl=METRICS_CACHE_TTL)
+_metrics_cache_lock = threading.Lock()
+
+
+@cached(_metrics_cache, key=lambda: hashkey("aggregate"), lock=_metrics_cache_lock)
+def _cached_aggregate_metrics() -> dict:
+    return get_aggregate_metrics()
+
+
+@cached(_metrics_cache, key=lambda: hashkey("leaderboard"), lock=_metrics_cache_lock)
+def _cached_leaderboard() -> list[dict]:
+    by_uc = get_leaderboard_aggregates()
+    leaderboard = sorted(by_uc.items(), key=lambda x: x[1].get("answer_relevance", 0), reverse=True)
+    return [{"use_case": uc, **scores} for uc, scores in leaderboard]
+
+
+def invalidate_metrics_cache() -> None:
+    """Drop cached aggregates so the next poll reflects newly recorded evaluations."""
+    with _metrics_cache_lock:
+        _metrics_cache.clear()
+
 
 @router.get("/deepeval")
-async def get_deepeval_metrics():
+async def get_deepeval_metrics() -> dict:
     """Get aggregated DeepEval metrics (hallucination, toxicity, bias)."""
     try:
         from services.deepeval_evaluator import get_deepeval_aggregate_metrics
@@ -18,13 +51,13 @@ async def get_deepeval_metrics():
 
 
 @router.get("")
-async def get_metrics():
+async def get_metrics() -> dict:
     """Get aggregated evaluation metrics."""
-    return {"success": True, "data": get_aggregate_metrics()}
+    return {"success": True, "data": _cached_aggregate_metrics()}
 
 
 @router.get("/history")
-async def get_metrics_history(limit: int = Query(50, ge=1, le=500)):
+async def get_metrics_history(limit: int = Query(50, ge=1, le=500)) -> dict:
     """Get evaluation scores over time."""
     evals = get_evaluations(limit=limit)
     history = []
@@ -37,12 +70,9 @@ async def get_metrics_history(limit: int = Query(50, ge=1, le=500)):
 
 
 @router.get("/leaderboard")
-async def get_leaderboard():
+async def get_leaderboard() -> dict:
     """Get per-use-case evaluation rankings."""
-    metrics = get_aggregate_metrics()
-    by_uc = metrics.get("by_use_case", {})
-    leaderboard = sorted(by_uc.items(), key=lambda x: x[1].get("answer_relevance", 0), reverse=True)
-    return {"success": True, "data": [{"use_case": uc, **scores} for uc, scores in leaderboard]}
+    return {"success": True, "data": _cached_leaderboard()}
 
 
 @router.get("/evaluations")
@@ -50,13 +80,13 @@ async def list_evaluations(
     limit: int = Query(50, ge=1, le=500),
     use_case: str | None = None,
 ):
-    """List individual evaluation records."""
+    """List individual evaluation records as NDJSON (one record per line)."""
     evals = get_evaluations(limit=limit, use_case=use_case)
-    # Strip large fields for list view
-    return {
-        "success": True,
-        "data": [
-            {
+
+    async def rows():
+        for e in evals:
+            # Strip large fields for list view
+            yield orjson.dumps({
                 "evaluation_id": e["evaluation_id"],
                 "query": e["query"][:200],
                 "agent_response": e["agent_response"][:200],
@@ -64,7 +94,6 @@ async def list_evaluations(
                 "agent_id": e["agent_id"],
                 "scores": e["scores"],
                 "timestamp": e["timestamp"],
-            }
-            for e in evals
-        ],
-    }
+            }) + b"\n"
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
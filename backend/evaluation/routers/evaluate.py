@@ -1,6 +1,10 @@
 """Evaluate router — run TruLens + RAGAS + DeepEval on agent decisions."""
 
-from fastapi import APIRouter, BackgroundTasks
+import asyncio
+
+import msgspec
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from config import EVAL_BATCH_CONCURRENCY
 from models.schemas import (
     EvaluateRequest,
     EvaluateResponse,
@@ -8,17 +12,30 @@ from models.schemas import (
     BatchEvaluateRequest,
     BatchEvaluateResponse,
 )
-from services.trulens_evaluator import evaluate_rag
+from models.schemas_fast import (
+    BatchEvaluateRequestStruct,
+    EvaluateRequestStruct,
+    decode_error_detail,
+    openapi_request_body,
+)
+from routers.dashboard import invalidate_metrics_cache
+from services.trulens_evaluator import evaluate_rag_async, format_timestamp
 from services.ragas_evaluator import evaluate_with_ragas
 
 router = APIRouter(prefix="/evaluate", tags=["evaluate"])
 
 
+# Batch bodies decode straight into msgspec structs instead of running pydantic
+# validation per item
+_batch_decoder = msgspec.json.Decoder(BatchEvaluateRequestStruct)
+
+
 @router.post("", response_model=EvaluateResponse)
 async def evaluate_single(req: EvaluateRequest, background_tasks: BackgroundTasks):
     """Run TruLens + RAGAS + DeepEval evaluation on a single agent decision."""
-    # TruLens evaluation
-    trulens_result = evaluate_rag(
+    # TruLens evaluation — feedback calls fan out on worker threads; RAGAS and
+    # DeepEval make blocking LLM calls, so they run off the event loop too.
+    trulens_result = await evaluate_rag_async(
         query=req.query,
         retrieved_contexts=req.retrieved_contexts,
         agent_response=req.agent_response,
@@ -31,7 +48,8 @@ async def evaluate_single(req: EvaluateRequest, background_tasks: BackgroundTask
     ragas_scores = {}
     if req.retrieved_contexts and len(req.retrieved_contexts) > 0:
         try:
-            ragas_scores = evaluate_with_ragas(
+            ragas_scores = await asyncio.to_thread(
+                evaluate_with_ragas,
                 query=req.query,
                 retrieved_contexts=req.retrieved_contexts,
                 agent_response=req.agent_response,
@@ -46,7 +64,8 @@ async def evaluate_single(req: EvaluateRequest, background_tasks: BackgroundTask
     try:
         from services.deepeval_evaluator import evaluate_with_deepeval
 
-        deepeval_result = evaluate_with_deepeval(
+        deepeval_result = await asyncio.to_thread(
+            evaluate_with_deepeval,
             query=req.query,
             retrieved_contexts=req.retrieved_contexts,
             agent_response=req.agent_response,
@@ -58,12 +77,15 @@ async def evaluate_single(req: EvaluateRequest, background_tasks: BackgroundTask
     except Exception:
         pass
 
-    # Combine scores
-    scores = [EvalScore(**s) for s in trulens_result["scores"]]
+    # New evaluation recorded — cached dashboard aggregates are stale
+    invalidate_metrics_cache()
+
+    # Combine scores — evaluator output is trusted, so skip re-validation
+    scores = [EvalScore.model_construct(**s) for s in trulens_result["scores"]]
     for metric, value in ragas_scores.items():
-        scores.append(EvalScore(metric=f"ragas_{metric}", score=value, details=None))
+        scores.append(EvalScore.model_construct(metric=f"ragas_{metric}", score=value, details=None))
     for s in deepeval_scores:
-        scores.append(EvalScore(**s))
+        scores.append(EvalScore.model_construct(**s))
 
     # BrainTrust logging (fire-and-forget)
     try:
@@ -82,31 +104,45 @@ async def evaluate_single(req: EvaluateRequest, background_tasks: BackgroundTask
     except Exception:
         pass
 
-    return EvaluateResponse(
+    return EvaluateResponse.model_construct(
         success=True,
         evaluation_id=trulens_result["evaluation_id"],
         scores=scores,
         use_case=req.use_case,
-        timestamp=trulens_result["timestamp"],
+        timestamp=format_timestamp(trulens_result["timestamp_ns"]),
     )
 
 
-@router.post("/batch", response_model=BatchEvaluateResponse)
-async def evaluate_batch(req: BatchEvaluateRequest, background_tasks: BackgroundTasks):
+@router.post(
+    "/batch",
+    response_model=BatchEvaluateResponse,
+    openapi_extra=openapi_request_body(BatchEvaluateRequest),
+)
+async def evaluate_batch(request: Request, background_tasks: BackgroundTasks):
     """Batch evaluate multiple decisions."""
-    results = []
-    for ev in req.evaluations:
-        try:
-            result = await evaluate_single(ev)
-            results.append(result)
-        except Exception as e:
-            results.append(
-                EvaluateResponse(
-                    success=False,
-                    evaluation_id="",
-                    scores=[],
-                    use_case=ev.use_case,
-                    timestamp="",
-                )
-            )
-    return BatchEvaluateResponse(success=True, count=len(results), results=results)
+    try:
+        req = _batch_decoder.decode(await request.body())
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=decode_error_detail(e))
+
+    # Bound fan-out so a large batch doesn't trip LLM rate limits
+    sem = asyncio.Semaphore(EVAL_BATCH_CONCURRENCY)
+
+    async def _run(ev: EvaluateRequestStruct):
+        async with sem:
+            return await evaluate_single(ev, background_tasks)
+
+    outcomes = await asyncio.gather(*(_run(ev) for ev in req.evaluations), return_exceptions=True)
+    results = [
+        EvaluateResponse.model_construct(
+            success=False,
+            evaluation_id="",
+            scores=[],
+            use_case=ev.use_case,
+            timestamp="",
+        )
+        if isinstance(outcome, Exception)
+        else outcome
+        for ev, outcome in zip(req.evaluations, outcomes)
+    ]
+    return BatchEvaluateResponse.model_construct(success=True, count=len(results), results=results)
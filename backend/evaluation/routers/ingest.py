@@ -1,42 +1,66 @@
 """Ingest router — embed and upsert records to Pinecone."""
 
+import asyncio
 import uuid
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 import httpx
+import msgspec
 
 from config import NODE_BACKEND_URL
-from models.schemas import IngestRequest, IngestResponse, IngestRecord
+from models.schemas import IngestRequest, IngestResponse
+from models.schemas_fast import IngestRequestStruct, decode_error_detail, openapi_request_body
 from services.pinecone_service import get_pinecone_service
 
 router = APIRouter(prefix="/ingest", tags=["ingest"])
 
+# Shared client for Node backend calls — keeps the connection pool warm across
+# requests. Closed from the app lifespan via close_node_client().
+_node_client = httpx.AsyncClient(base_url=NODE_BACKEND_URL, http2=True, timeout=30.0)
 
-@router.post("", response_model=IngestResponse)
-async def ingest_records(req: IngestRequest):
+
+async def close_node_client():
+    await _node_client.aclose()
+
+
+# (label, seller field) for the seller summary text embedded in Pinecone
+_SELLER_TEXT_FIELDS = (
+    ("Seller", "businessName"),
+    ("Category", "businessCategory"),
+    ("Country", "country"),
+    ("Status", "status"),
+    ("Email", "email"),
+)
+
+
+# Ingest bodies can carry thousands of records — decode them with msgspec and
+# keep the pydantic model only for the OpenAPI schema. strict=False keeps
+# pydantic's lax coercions, e.g. a numeric-string riskScore.
+_ingest_decoder = msgspec.json.Decoder(IngestRequestStruct, strict=False)
+
+
+@router.post(
+    "",
+    response_model=IngestResponse,
+    openapi_extra=openapi_request_body(IngestRequest),
+)
+async def ingest_records(request: Request):
     """Upsert records into a Pinecone namespace."""
+    try:
+        req = _ingest_decoder.decode(await request.body())
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=decode_error_detail(e))
+
     svc = get_pinecone_service()
     records = []
     for r in req.records:
-        record = {"_id": r.id or f"KB-{uuid.uuid4()}", "text": r.text}
-        if r.category:
-            record["category"] = r.category
-        if r.domain:
-            record["domain"] = r.domain
-        if r.outcome:
-            record["outcome"] = r.outcome
-        if r.risk_score is not None:
-            record["riskScore"] = r.risk_score
-        if r.seller_id:
-            record["sellerId"] = r.seller_id
-        if r.country:
-            record["country"] = r.country
-        if r.timestamp:
-            record["timestamp"] = r.timestamp
-        if r.source:
-            record["source"] = r.source
+        # Renamed keys are the Pinecone fields and unset fields are omitted.
+        # Empty strings are dropped too; a risk score of 0 is kept.
+        record = {k: v for k, v in msgspec.to_builtins(r).items() if v != ""}
+        record["_id"] = r.id or f"KB-{uuid.uuid4()}"
+        record["text"] = r.text
         records.append(record)
 
-    count = svc.upsert(req.namespace, records)
+    count = await svc.upsert_async(req.namespace, records)
     return IngestResponse(success=True, upserted_count=count, namespace=req.namespace)
 
 
@@ -46,56 +70,59 @@ async def bulk_ingest_from_node():
     svc = get_pinecone_service()
     total = 0
 
-    # Fetch existing knowledge from Node observability endpoint
+    # Both Node calls are independent — issue them together. Failures come back
+    # as exceptions and are handled per response below.
+    health_resp, sellers_resp = await asyncio.gather(
+        _node_client.get("/api/observability/health"),
+        _node_client.get("/api/onboarding/sellers"),
+        return_exceptions=True,
+    )
+
+    # Existing knowledge from Node observability endpoint
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.get(f"{NODE_BACKEND_URL}/api/observability/health")
-            if resp.status_code == 200:
-                data = resp.json()
-                kb_stats = data.get("data", {}).get("knowledgeBase", {})
-                print(f"[BulkIngest] Node KB stats: {kb_stats}")
+        if isinstance(health_resp, Exception):
+            raise health_resp
+        if health_resp.status_code == 200:
+            data = health_resp.json()
+            kb_stats = data.get("data", {}).get("knowledgeBase", {})
+            print(f"[BulkIngest] Node KB stats: {kb_stats}")
     except Exception as e:
         print(f"[BulkIngest] Could not reach Node backend: {e}")
 
-    # Fetch sellers for seeding onboarding-knowledge namespace
+    # Sellers for seeding onboarding-knowledge namespace
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.get(f"{NODE_BACKEND_URL}/api/onboarding/sellers")
-            if resp.status_code == 200:
-                sellers_data = resp.json()
-                sellers = sellers_data.get("data", {}).get("sellers", [])
-                records = []
-                for s in sellers[:100]:  # Limit to 100 for initial seed
-                    text_parts = [
-                        f"Seller: {s.get('businessName', 'Unknown')}",
-                        f"Category: {s.get('businessCategory', 'Unknown')}",
-                        f"Country: {s.get('country', 'Unknown')}",
-                        f"Status: {s.get('status', 'Unknown')}",
-                        f"Email: {s.get('email', 'Unknown')}",
-                    ]
-                    risk = s.get("onboardingRiskAssessment", {})
-                    if risk:
-                        text_parts.append(f"Risk Score: {risk.get('riskScore', 'N/A')}")
-                        text_parts.append(f"Decision: {risk.get('decision', 'N/A')}")
-                        factors = risk.get("riskFactors", [])
-                        if factors:
-                            text_parts.append(f"Risk Factors: {', '.join(str(f) for f in factors[:5])}")
-
-                    records.append({
-                        "_id": s.get("sellerId", f"SELLER-{uuid.uuid4().hex[:8]}"),
-                        "text": ". ".join(text_parts),
-                        "category": s.get("businessCategory", ""),
-                        "domain": "onboarding",
-                        "outcome": risk.get("decision", ""),
-                        "riskScore": risk.get("riskScore", 0),
-                        "sellerId": s.get("sellerId", ""),
-                        "country": s.get("country", ""),
-                        "source": "bulk-ingest",
-                    })
-                if records:
-                    count = svc.upsert("onboarding-knowledge", records)
-                    total += count
-                    print(f"[BulkIngest] Upserted {count} sellers to onboarding-knowledge")
+        if isinstance(sellers_resp, Exception):
+            raise sellers_resp
+        if sellers_resp.status_code == 200:
+            sellers_data = sellers_resp.json()
+            sellers = sellers_data.get("data", {}).get("sellers", [])
+            records = []
+            for s in sellers[:100]:  # Limit to 100 for initial seed
+                text_parts = [f"{label}: {s.get(field) or 'Unknown'}" for label, field in _SELLER_TEXT_FIELDS]
+                risk = s.get("onboardingRiskAssessment") or {}
+                if risk:
+                    text_parts.append(f"Risk Score: {risk.get('riskScore', 'N/A')}")
+                    text_parts.append(f"Decision: {risk.get('decision', 'N/A')}")
+                    factors = risk.get("riskFactors", [])
+                    if factors:
+                        text_parts.append(f"Risk Factors: {', '.join(str(f) for f in factors[:5])}")
+
+                seller_id = s.get("sellerId")
+                records.append({
+                    "_id": seller_id or f"SELLER-{uuid.uuid4().hex[:8]}",
+                    "text": ". ".join(text_parts),
+                    "category": s.get("businessCategory") or "",
+                    "domain": "onboarding",
+                    "outcome": risk.get("decision", ""),
+                    "riskScore": risk.get("riskScore", 0),
+                    "sellerId": seller_id or "",
+                    "country": s.get("country") or "",
+                    "source": "bulk-ingest",
+                })
+            if records:
+                count = await svc.upsert_async("onboarding-knowledge", records)
+                total += count
+                print(f"[BulkIngest] Upserted {count} sellers to onboarding-knowledge")
     except Exception as e:
         print(f"[BulkIngest] Seller fetch error: {e}")
 
@@ -1,52 +1,64 @@
 """Retrieval evaluation router — hit rate, MRR, NDCG metrics."""
 
-import math
+import numpy as np
 from fastapi import APIRouter
 from models.schemas import RetrievalEvalRequest, RetrievalEvalResponse
 
 router = APIRouter(prefix="/evaluate/retrieval", tags=["retrieval-eval"])
 
+# 1 / log2(rank + 1) for ranks 1..1024 — the DCG discount, computed once
+_LOG2_INV = 1.0 / np.log2(np.arange(2, 1026))
+# _IDCG[n] = sum of the first n discounts, i.e. the ideal DCG with n relevant docs
+_IDCG = np.concatenate(([0.0], np.cumsum(_LOG2_INV)))
 
-def _compute_hit_rate(retrieved_ids: list[str], relevant_ids: list[str]) -> float:
+
+def _discounts(n: int) -> np.ndarray:
+    """First n DCG discounts (falls back to computing them past the table)."""
+    if n <= len(_LOG2_INV):
+        return _LOG2_INV[:n]
+    return 1.0 / np.log2(np.arange(2, n + 2))
+
+
+def _hit_mask(retrieved_ids: list[str], relevant_set: frozenset[str]) -> np.ndarray:
+    """Boolean mask over retrieved_ids marking relevant docs."""
+    return np.fromiter((rid in relevant_set for rid in retrieved_ids), dtype=bool, count=len(retrieved_ids))
+
+
+def _compute_hit_rate(retrieved_ids: list[str], relevant_set: frozenset[str]) -> float:
     """Fraction of relevant docs found in retrieved set."""
-    if not relevant_ids:
+    if not relevant_set:
         return 0.0
     if not retrieved_ids:
         return 0.0
-    retrieved_set = set(retrieved_ids)
-    hits = sum(1 for rid in relevant_ids if rid in retrieved_set)
-    return hits / len(relevant_ids)
+    return len(relevant_set.intersection(retrieved_ids)) / len(relevant_set)
 
 
-def _compute_mrr(retrieved_ids: list[str], relevant_ids: list[str]) -> float:
+def _compute_mrr(retrieved_ids: list[str], relevant_set: frozenset[str]) -> float:
     """1 / rank of first relevant document in retrieved list."""
-    if not retrieved_ids or not relevant_ids:
+    if not retrieved_ids or not relevant_set:
+        return 0.0
+    hits = _hit_mask(retrieved_ids, relevant_set)
+    if not hits.any():
         return 0.0
-    relevant_set = set(relevant_ids)
-    for i, rid in enumerate(retrieved_ids):
-        if rid in relevant_set:
-            return 1.0 / (i + 1)
-    return 0.0
+    return 1.0 / (int(np.argmax(hits)) + 1)
 
 
-def _compute_ndcg(retrieved_ids: list[str], relevant_ids: list[str], k: int = 5) -> float:
+def _compute_ndcg(retrieved_ids: list[str], relevant_set: frozenset[str], k: int = 5) -> float:
     """Normalized Discounted Cumulative Gain at k (binary relevance)."""
-    if not retrieved_ids or not relevant_ids:
+    if not retrieved_ids or not relevant_set:
         return 0.0
-    relevant_set = set(relevant_ids)
 
-    # DCG
-    limit = min(k, len(retrieved_ids))
-    dcg = 0.0
-    for i in range(limit):
-        if retrieved_ids[i] in relevant_set:
-            dcg += 1.0 / math.log2(i + 2)
+    # DCG — k <= 0 scores nothing (negative slices/indexes would wrap around)
+    limit = max(min(k, len(retrieved_ids)), 0)
+    hits = _hit_mask(retrieved_ids[:limit], relevant_set)
+    dcg = float(_discounts(limit)[hits].sum())
 
     # IDCG
-    ideal_count = min(k, len(relevant_ids))
-    idcg = 0.0
-    for i in range(ideal_count):
-        idcg += 1.0 / math.log2(i + 2)
+    ideal_count = max(min(k, len(relevant_set)), 0)
+    if ideal_count < len(_IDCG):
+        idcg = float(_IDCG[ideal_count])
+    else:
+        idcg = float(_discounts(ideal_count).sum())
 
     if idcg == 0:
         return 0.0
@@ -57,9 +69,11 @@ def _compute_ndcg(retrieved_ids: list[str], relevant_ids: list[str], k: int = 5)
 async def evaluate_retrieval(req: RetrievalEvalRequest):
     """Evaluate retrieval quality with hit rate, MRR, and NDCG."""
     k = req.k or 5
-    hit_rate = _compute_hit_rate(req.retrieved_ids, req.relevant_ids)
-    mrr = _compute_mrr(req.retrieved_ids, req.relevant_ids)
-    ndcg_at_k = _compute_ndcg(req.retrieved_ids, req.relevant_ids, k)
+    # Hash the relevant ids once and share the set across all three metrics
+    relevant_set = frozenset(req.relevant_ids)
+    hit_rate = _compute_hit_rate(req.retrieved_ids, relevant_set)
+    mrr = _compute_mrr(req.retrieved_ids, relevant_set)
+    ndcg_at_k = _compute_ndcg(req.retrieved_ids, relevant_set, k)
 
     return RetrievalEvalResponse(
         hit_rate=hit_rate,
@@ -1,28 +1,43 @@
 """Search router — vector similarity search across Pinecone namespaces."""
 
+import asyncio
+import heapq
+
 from fastapi import APIRouter
-from models.schemas import SearchRequest, SearchResponse, SearchResult
+from config import NAMESPACES
+from models.schemas import SearchRequest, SearchResponse
 from services.pinecone_service import get_pinecone_service
+from services.query_decomposer import decompose_query_async
 
 router = APIRouter(prefix="/search", tags=["search"])
 
 
+def _search_response(hits: list[dict], namespace: str, query: str) -> dict:
+    """SearchResponse body as a plain dict — FastAPI validates and dumps it in pydantic-core."""
+    return {
+        "success": True,
+        "results": [
+            {"id": h["id"], "text": h["text"], "score": h["score"], "metadata": h["metadata"]}
+            for h in hits
+        ],
+        "namespace": namespace,
+        "query": query,
+    }
+
+
 @router.post("", response_model=SearchResponse)
 async def search(req: SearchRequest):
     """Generic vector similarity search."""
     svc = get_pinecone_service()
-    hits = svc.search(
+    hits = await asyncio.to_thread(
+        svc.search,
         namespace=req.namespace,
         query=req.query,
         top_k=req.top_k,
         filters=req.filters,
         rerank=req.rerank,
     )
-    results = [
-        SearchResult(id=h["id"], text=h["text"], score=h["score"], metadata=h["metadata"])
-        for h in hits
-    ]
-    return SearchResponse(success=True, results=results, namespace=req.namespace, query=req.query)
+    return _search_response(hits, req.namespace, req.query)
 
 
 @router.post("/similar-cases", response_model=SearchResponse)
@@ -51,25 +66,29 @@ async def search_patterns(req: SearchRequest):
 async def search_investigate(req: SearchRequest):
     """UC4: Investigation Q&A — search across all namespaces, rerank."""
     svc = get_pinecone_service()
+    # One Pinecone query per namespace, issued concurrently (the SDK is sync)
+    hits_per_ns = await asyncio.gather(*(
+        asyncio.to_thread(svc.search, namespace=ns, query=req.query, top_k=req.top_k, rerank=True)
+        for ns in NAMESPACES
+    ))
     all_results = []
-    for ns in ["fraud-cases", "onboarding-knowledge", "risk-patterns", "investigations"]:
-        hits = svc.search(namespace=ns, query=req.query, top_k=req.top_k, rerank=True)
+    for ns, hits in zip(NAMESPACES, hits_per_ns):
         for h in hits:
             h["metadata"]["namespace"] = ns
             all_results.append(h)
 
-    # Sort by score, take top_k
-    all_results.sort(key=lambda x: x["score"], reverse=True)
-    top = all_results[: req.top_k]
+    # Take top_k by score without sorting everything
+    top = heapq.nlargest(req.top_k, all_results, key=lambda x: x["score"])
 
-    results = [
-        SearchResult(id=h["id"], text=h["text"], score=h["score"], metadata=h["metadata"])
-        for h in top
-    ]
-    return SearchResponse(success=True, results=results, namespace="all", query=req.query)
+    return _search_response(top, "all", req.query)
 
 
-from services.query_decomposer import decompose_query
+async def _tagged_search(svc, namespace: str, sub_query: str) -> list[dict]:
+    hits = await asyncio.to_thread(svc.search, namespace=namespace, query=sub_query, top_k=3, rerank=True)
+    for h in hits:
+        h["metadata"]["namespace"] = namespace
+        h["metadata"]["sub_query"] = sub_query
+    return hits
 
 
 @router.post("/advanced", response_model=SearchResponse)
@@ -77,35 +96,29 @@ async def search_advanced(req: SearchRequest):
     """Advanced RAG: decompose query, search multiple namespaces, rerank."""
     svc = get_pinecone_service()
 
-    # Decompose the query into sub-queries
-    sub_queries = decompose_query(req.query, max_sub_queries=3)
+    # Sub-queries stream out of the decomposer — start searching each one
+    # across all namespaces as soon as it arrives
+    tasks = []
+    seen_queries = set()
+    async for sq in decompose_query_async(req.query, max_sub_queries=3):
+        if sq in seen_queries:
+            continue
+        seen_queries.add(sq)
+        tasks.extend(asyncio.create_task(_tagged_search(svc, ns, sq)) for ns in NAMESPACES)
+
+    # Collect in completion order; a doc found by several sub-queries keeps its best-scoring hit
+    best: dict[str, dict] = {}
+    for fut in asyncio.as_completed(tasks):
+        try:
+            hits = await fut
+        except Exception:
+            continue
+        for h in hits:
+            kept = best.get(h["id"])
+            if kept is None or h["score"] > kept["score"]:
+                best[h["id"]] = h
 
-    # Search across all namespaces for each sub-query
-    all_results = []
-    seen_ids = set()
-    namespaces = ["fraud-cases", "onboarding-knowledge", "risk-patterns", "investigations"]
-
-    for sq in sub_queries:
-        for ns in namespaces:
-            try:
-                hits = svc.search(namespace=ns, query=sq, top_k=3, rerank=True)
-                for h in hits:
-                    if h["id"] not in seen_ids:
-                        seen_ids.add(h["id"])
-                        h["metadata"]["namespace"] = ns
-                        h["metadata"]["sub_query"] = sq
-                        all_results.append(h)
-            except Exception:
-                continue
-
-    # Sort by score, take top_k
-    all_results.sort(key=lambda x: x["score"], reverse=True)
-    top = all_results[: req.top_k]
-
-    results = [
-        SearchResult(id=h["id"], text=h["text"], score=h["score"], metadata=h["metadata"])
-        for h in top
-    ]
-    return SearchResponse(
-        success=True, results=results, namespace="advanced", query=req.query
-    )
+    # Take top_k by score without sorting everything
+    top = heapq.nlargest(req.top_k, best.values(), key=lambda x: x["score"])
+
+    return _search_response(top, "advanced", req.query)
@@ -0,0 +1,31 @@
+"""Shared AsyncAnthropic clients, one per running event loop."""
+
+import asyncio
+import threading
+import weakref
+
+from anthropic import AsyncAnthropic
+
+# AsyncAnthropic's HTTP pool is bound to the loop that first used it
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncAnthropic]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def get_async_client(api_key: str) -> AsyncAnthropic:
+    """AsyncAnthropic for the running loop, built on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        with _lock:
+            client = _async_clients.get(loop)
+            if client is None:
+                client = _async_clients[loop] = AsyncAnthropic(api_key=api_key)
+    return client
+
+
+def reset_async_clients() -> None:
+    """Drop every cached client so the next call builds a fresh one."""
+    with _lock:
+        _async_clients.clear()
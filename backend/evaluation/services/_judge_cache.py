@@ -0,0 +1,114 @@
+"""Persistent cache of judge LLM results, content-addressed by metric and inputs."""
+
+import functools
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from config import CLAUDE_MODEL, JUDGE_CACHE_PATH, JUDGE_CACHE_TTL
+
+# Bump when a judge prompt or the cached value shape changes; together with the
+# judge model it is part of every key, so stale scores are never served.
+CACHE_VERSION = 1
+
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+
+
+def _get_conn() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(JUDGE_CACHE_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS judge_cache ("
+            "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        conn.execute("DELETE FROM judge_cache WHERE created_at < ?", (time.time() - JUDGE_CACHE_TTL,))
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def _part(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "\n---\n".join(value)
+    return str(value)
+
+
+def judge_key(metric: str, *inputs) -> str:
+    """blake2b over CACHE_VERSION, CLAUDE_MODEL, the metric name and its inputs (query, response, contexts, ...)."""
+    h = hashlib.blake2b(f"v{CACHE_VERSION}\x1f{CLAUDE_MODEL}\x1f{metric}".encode(), digest_size=20)
+    for value in inputs:
+        h.update(b"\x1f")
+        h.update(_part(value).encode())
+    return h.hexdigest()
+
+
+def get(key: str):
+    """Cached value for key, or None if missing or expired."""
+    if JUDGE_CACHE_TTL <= 0:
+        return None
+    with _lock:
+        row = _get_conn().execute(
+            "SELECT value, created_at FROM judge_cache WHERE key = ?", (key,)
+        ).fetchone()
+    if row is None or time.time() - row[1] > JUDGE_CACHE_TTL:
+        return None
+    return json.loads(row[0])
+
+
+def put(key: str, namespace: str, value) -> None:
+    """Store a JSON-serializable result. Values containing NaN (failed scores) are not cached."""
+    if JUDGE_CACHE_TTL <= 0:
+        return
+    try:
+        payload = json.dumps(value, allow_nan=False)
+    except ValueError:
+        return
+    with _lock:
+        conn = _get_conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO judge_cache (key, namespace, value, created_at) VALUES (?, ?, ?, ?)",
+            (key, namespace, payload, time.time()),
+        )
+        conn.commit()
+
+
+def clear(namespace: str | None = None) -> None:
+    with _lock:
+        conn = _get_conn()
+        if namespace is None:
+            conn.execute("DELETE FROM judge_cache")
+        else:
+            conn.execute("DELETE FROM judge_cache WHERE namespace = ?", (namespace,))
+        conn.commit()
+
+
+def cached(namespace: str):
+    """Cache a judge function's result keyed by its name and positional/keyword inputs.
+
+    The wrapped function accepts force_refresh=True to skip the lookup (the
+    fresh result is still stored). Exceptions are never cached;
+    JUDGE_CACHE_TTL <= 0 turns the cache off.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, force_refresh: bool = False, **kwargs):
+            key_inputs = [*args, *(f"{k}={_part(v)}" for k, v in sorted(kwargs.items()))]
+            key = judge_key(f"{namespace}:{fn.__name__}", *key_inputs)
+            if not force_refresh:
+                hit = get(key)
+                if hit is not None:
+                    return hit
+            result = fn(*args, **kwargs)
+            put(key, namespace, result)
+            return result
+
+        return wrapper
+
+    return decorator
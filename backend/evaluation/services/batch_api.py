@@ -0,0 +1,53 @@
+"""Anthropic Message Batches API — submit, poll and collect offline judge calls."""
+
+import threading
+import time
+
+from anthropic import Anthropic
+
+from config import ANTHROPIC_API_KEY
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client() -> Anthropic:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = Anthropic(api_key=ANTHROPIC_API_KEY)
+    return _client
+
+
+def submit_batch(requests: list[dict]) -> str:
+    """Submit [{custom_id, params}] message requests as one batch; returns the batch id."""
+    batch = _get_client().messages.batches.create(requests=requests)
+    print(f"[BatchAPI] Submitted batch {batch.id} ({len(requests)} requests)")
+    return batch.id
+
+
+def poll(batch_id: str, interval: float = 30.0, timeout: float | None = None):
+    """Block until the batch has ended; returns the final batch object."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    client = _get_client()
+    while True:
+        batch = client.messages.batches.retrieve(batch_id)
+        if batch.processing_status == "ended":
+            return batch
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"Batch {batch_id} still {batch.processing_status} after {timeout}s")
+        time.sleep(interval)
+
+
+def fetch_results(batch_id: str) -> dict[str, str | None]:
+    """Map custom_id → response text; errored, expired or canceled requests map to None."""
+    results = {}
+    for entry in _get_client().messages.batches.results(batch_id):
+        if entry.result.type == "succeeded":
+            results[entry.custom_id] = "".join(
+                block.text for block in entry.result.message.content if block.type == "text"
+            )
+        else:
+            results[entry.custom_id] = None
+    return results
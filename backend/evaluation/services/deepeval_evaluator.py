@@ -1,13 +1,20 @@
 """DeepEval evaluator — hallucination, toxicity, and bias metrics."""
 
+import heapq
 import os
-import uuid
+import threading
+from collections import deque
 from datetime import datetime, timezone
+from secrets import token_hex
 
-from config import ANTHROPIC_API_KEY
+from config import ANTHROPIC_API_KEY, EVAL_HISTORY_MAX
 
-# Store evaluations in memory (matches trulens pattern)
-_deepeval_evaluations: list[dict] = []
+# Recent evaluations in memory, oldest evicted past EVAL_HISTORY_MAX
+_deepeval_evaluations: deque[dict] = deque(maxlen=EVAL_HISTORY_MAX)
+# All-time [sum, count] per metric and evaluation count, so evictions don't skew aggregates
+_deepeval_totals: dict[str, list] = {}
+_deepeval_count = 0
+_deepeval_lock = threading.Lock()
 
 
 def evaluate_with_deepeval(
@@ -35,7 +42,7 @@ def evaluate_with_deepeval(
     except ImportError:
         # DeepEval not installed — return empty scores
         return {
-            "evaluation_id": f"DEVAL-{uuid.uuid4().hex[:12]}",
+            "evaluation_id": f"DEVAL-{token_hex(12)}",
             "scores": [],
             "error": "deepeval not installed",
         }
@@ -68,7 +75,7 @@ def evaluate_with_deepeval(
         def get_model_name(self) -> str:
             return self.model_name
 
-    evaluation_id = f"DEVAL-{uuid.uuid4().hex[:12]}"
+    evaluation_id = f"DEVAL-{token_hex(12)}"
     scores = []
     model = AnthropicEvalModel()
 
@@ -140,21 +147,29 @@ def evaluate_with_deepeval(
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
 
-    _deepeval_evaluations.append(result)
+    global _deepeval_count
+    with _deepeval_lock:
+        _deepeval_evaluations.append(result)
+        _deepeval_count += 1
+        for s in scores:
+            bucket = _deepeval_totals.setdefault(s["metric"], [0.0, 0])
+            bucket[0] += s["score"]
+            bucket[1] += 1
     return result
 
 
 def get_deepeval_evaluations(limit: int = 50, use_case: str | None = None) -> list[dict]:
     """Get recent DeepEval evaluations, optionally filtered by use case."""
-    evals = _deepeval_evaluations
+    with _deepeval_lock:
+        evals = list(_deepeval_evaluations)
     if use_case:
         evals = [e for e in evals if e["use_case"] == use_case]
-    return sorted(evals, key=lambda e: e["timestamp"], reverse=True)[:limit]
+    return heapq.nlargest(limit, evals, key=lambda e: e["timestamp"])
 
 
 def get_deepeval_aggregate_metrics() -> dict:
     """Compute aggregate DeepEval metrics across all evaluations."""
-    if not _deepeval_evaluations:
+    if not _deepeval_count:
         return {
             "deepeval_hallucination": 0.0,
             "deepeval_toxicity": 0.0,
@@ -162,18 +177,7 @@ def get_deepeval_aggregate_metrics() -> dict:
             "total_evaluations": 0,
         }
 
-    metrics: dict[str, list[float]] = {}
-
-    for ev in _deepeval_evaluations:
-        for s in ev["scores"]:
-            m = s["metric"]
-            if m not in metrics:
-                metrics[m] = []
-            metrics[m].append(s["score"])
-
-    def avg(lst):
-        return sum(lst) / len(lst) if lst else 0.0
-
-    result = {k: round(avg(v), 4) for k, v in metrics.items()}
-    result["total_evaluations"] = len(_deepeval_evaluations)
+    with _deepeval_lock:
+        result = {m: round(total / n, 4) if n else 0.0 for m, (total, n) in _deepeval_totals.items()}
+        result["total_evaluations"] = _deepeval_count
     return result
@@ -1,5 +1,10 @@
 """Pinecone vector database service — index management, upsert, query."""
 
+import asyncio
+import threading
+
+import orjson
+from cachetools import TTLCache
 from pinecone import Pinecone
 
 from config import (
@@ -10,8 +15,29 @@ from config import (
     EMBEDDING_MODEL,
     EMBEDDING_FIELD_MAP,
     NAMESPACES,
+    SEARCH_CACHE_TTL,
 )
 
+# Pinecone accepts at most 96 records per upsert_records call on
+# integrated-embedding indexes.
+UPSERT_BATCH_SIZE = 96
+
+# Short-lived cache of search hits keyed by the full set of search params —
+# dashboards and repeated UI queries hit Pinecone with identical requests.
+_search_cache = TTLCache(maxsize=1024, ttl=SEARCH_CACHE_TTL)
+_search_cache_lock = threading.Lock()
+
+
+def invalidate_search_cache(namespace: str) -> None:
+    """Drop cached hits for a namespace after its records change."""
+    with _search_cache_lock:
+        for key in [k for k in _search_cache if k[0] == namespace]:
+            _search_cache.pop(key, None)
+
+
+def _batches(records: list[dict], size: int = UPSERT_BATCH_SIZE) -> list[list[dict]]:
+    return [records[i : i + size] for i in range(0, len(records), size)]
+
 
 class PineconeService:
     def __init__(self):
@@ -41,7 +67,26 @@ class PineconeService:
         """Upsert records into a namespace. Each record must have _id and text."""
         if not records:
             return 0
-        self.index.upsert_records(namespace=namespace, records=records)
+        try:
+            for batch in _batches(records):
+                self.index.upsert_records(namespace=namespace, records=batch)
+        finally:
+            # Batches written before a failure must not hide behind cached hits
+            invalidate_search_cache(namespace)
+        return len(records)
+
+    async def upsert_async(self, namespace: str, records: list[dict]) -> int:
+        """Upsert records in concurrent batches (the SDK is sync, so each batch runs in a thread)."""
+        if not records:
+            return 0
+        try:
+            await asyncio.gather(*(
+                asyncio.to_thread(self.index.upsert_records, namespace=namespace, records=batch)
+                for batch in _batches(records)
+            ))
+        finally:
+            # Batches written before a failure must not hide behind cached hits
+            invalidate_search_cache(namespace)
         return len(records)
 
     def search(
@@ -53,6 +98,26 @@ class PineconeService:
         rerank: bool = False,
     ) -> list[dict]:
         """Search a namespace by text query."""
+        filters_key = orjson.dumps(filters, option=orjson.OPT_SORT_KEYS) if filters else None
+        key = (namespace, query, top_k, filters_key, rerank)
+        with _search_cache_lock:
+            hits = _search_cache.get(key)
+        if hits is None:
+            hits = self._search(namespace, query, top_k, filters, rerank)
+            with _search_cache_lock:
+                _search_cache[key] = hits
+        # Callers tag hit metadata in place — hand out copies so the cache stays clean
+        return [{**h, "metadata": dict(h["metadata"])} for h in hits]
+
+    def _search(
+        self,
+        namespace: str,
+        query: str,
+        top_k: int,
+        filters: dict | None,
+        rerank: bool,
+    ) -> list[dict]:
+        """Uncached Pinecone search — see search()."""
         search_params = {
             "namespace": namespace,
             "query": {"top_k": top_k, "inputs": {"text": query}},
@@ -93,12 +158,15 @@ class PineconeService:
         }
 
 
-# Singleton
-_instance: PineconeService | None = None
+# Singleton — built once under the lock; later calls return it without locking.
+_service: PineconeService | None = None
+_init_lock = threading.Lock()
 
 
 def get_pinecone_service() -> PineconeService:
-    global _instance
-    if _instance is None:
-        _instance = PineconeService()
-    return _instance
+    global _service
+    if _service is None:
+        with _init_lock:
+            if _service is None:
+                _service = PineconeService()
+    return _service
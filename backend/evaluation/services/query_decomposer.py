@@ -1,9 +1,23 @@
 """Query Decomposer — breaks complex queries into sub-queries using Claude."""
 
 import os
+import re
+import threading
+from collections.abc import AsyncIterator, Iterator
+
+import orjson
 from anthropic import Anthropic
 
+from config import CLAUDE_MODEL
+from services._anthropic_client import get_async_client, reset_async_clients
+
+# Heuristic for queries not worth decomposing: short (< 8 words) and no
+# conjunction or list separator joining several asks.
+_ATOMIC_MAX_WORDS = 8
+_COMPOUND = re.compile(r"\b(?:and|then|also|plus|vs\.?|versus)\b|[,;]", re.IGNORECASE)
+
 _client = None
+_client_lock = threading.Lock()
 
 
 def _get_client():
@@ -12,39 +26,141 @@ def _get_client():
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             return None
-        _client = Anthropic(api_key=api_key)
+        with _client_lock:
+            if _client is None:
+                _client = Anthropic(api_key=api_key)
     return _client
 
 
-def decompose_query(query: str, max_sub_queries: int = 3) -> list[str]:
+def _get_async_client():
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
+        return None
+    return get_async_client(api_key)
+
+
+def reset_clients() -> None:
+    """Drop cached clients so the next call builds fresh ones."""
+    global _client
+    with _client_lock:
+        _client = None
+    reset_async_clients()
+
+
+def _request_params(query: str, max_sub_queries: int) -> dict:
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": 512,
+        "temperature": 0.2,
+        "system": (
+            "You decompose complex fraud investigation queries into simpler sub-queries. "
+            "Return a JSON array of strings, each a focused sub-query. "
+            f"Maximum {max_sub_queries} sub-queries. "
+            "Return ONLY the JSON array, no explanation."
+        ),
+        "messages": [{"role": "user", "content": f"Decompose this query: {query}"}],
+    }
+
+
+def _looks_atomic(query: str) -> bool:
+    """True when the query is short and single-part, so Claude would just echo it back."""
+    return len(query.split()) < _ATOMIC_MAX_WORDS and not _COMPOUND.search(query)
+
+
+class _StringArrayParser:
+    """Incremental JSON string-array parser — emits each element as soon as its closing quote arrives."""
+
+    def __init__(self):
+        self.done = False
+        self._started = False
+        self._in_string = False
+        self._escaped = False
+        self._chars: list[str] = []
+
+    def feed(self, chunk: str) -> list[str]:
+        completed = []
+        for ch in chunk:
+            if self.done:
+                break
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    raw = "".join(self._chars)
+                    # Only strings with escapes need a real JSON decode
+                    completed.append(orjson.loads(f'"{raw}"') if "\\" in raw else raw)
+                    self._chars.clear()
+                    continue
+                self._chars.append(ch)
+            elif not self._started:
+                self._started = ch == "["
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "]":
+                self.done = True
+        return completed
+
+
+def iter_sub_queries(query: str, max_sub_queries: int = 3, force: bool = False) -> Iterator[str]:
+    """Stream sub-queries from Claude, yielding each one as soon as it is complete.
+
+    Atomic-looking queries (see _looks_atomic) are yielded as-is without a
+    Claude call unless force=True. Falls back to yielding the original query
+    if Claude is unavailable or returns nothing usable.
+    """
+    emitted = 0
+    client = None if not force and _looks_atomic(query) else _get_client()
+    if client is not None:
+        try:
+            parser = _StringArrayParser()
+            with client.messages.stream(**_request_params(query, max_sub_queries)) as stream:
+                for chunk in stream.text_stream:
+                    for sub_query in parser.feed(chunk):
+                        yield sub_query
+                        emitted += 1
+                        if emitted == max_sub_queries:
+                            return
+                    if parser.done:
+                        break
+        except Exception:
+            pass
+    if not emitted:
+        yield query
+
+
+async def decompose_query_async(query: str, max_sub_queries: int = 3, force: bool = False) -> AsyncIterator[str]:
+    """Async iter_sub_queries on AsyncAnthropic — consume sub-queries as they stream in.
+
+    Start work per sub-query inside the loop and collect it afterwards, e.g.
+    create_task(retrieve(sq)) for each, then asyncio.as_completed(tasks).
+    """
+    emitted = 0
+    client = None if not force and _looks_atomic(query) else _get_async_client()
+    if client is not None:
+        try:
+            parser = _StringArrayParser()
+            async with client.messages.stream(**_request_params(query, max_sub_queries)) as stream:
+                async for chunk in stream.text_stream:
+                    for sub_query in parser.feed(chunk):
+                        yield sub_query
+                        emitted += 1
+                        if emitted == max_sub_queries:
+                            return
+                    if parser.done:
+                        break
+        except Exception:
+            pass
+    if not emitted:
+        yield query
+
+
+def decompose_query(query: str, max_sub_queries: int = 3, force: bool = False) -> list[str]:
     """Decompose a complex query into simpler sub-queries using Claude.
 
-    Falls back to returning the original query if Claude is unavailable.
+    Short single-part queries skip Claude unless force=True. Falls back to
+    returning the original query if Claude is unavailable.
     """
-    client = _get_client()
-    if client is None:
-        return [query]
-
-    try:
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=512,
-            temperature=0.2,
-            system=(
-                "You decompose complex fraud investigation queries into simpler sub-queries. "
-                "Return a JSON array of strings, each a focused sub-query. "
-                f"Maximum {max_sub_queries} sub-queries. "
-                "Return ONLY the JSON array, no explanation."
-            ),
-            messages=[{"role": "user", "content": f"Decompose this query: {query}"}],
-        )
-        import json
-
-        text = response.content[0].text.strip()
-        parsed = json.loads(text)
-        if isinstance(parsed, list) and len(parsed) > 0:
-            return parsed[:max_sub_queries]
-    except Exception:
-        pass
-
-    return [query]
+    return list(iter_sub_queries(query, max_sub_queries, force))
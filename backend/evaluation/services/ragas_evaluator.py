@@ -1,5 +1,8 @@
 """RAGAS metrics evaluator for RAG quality measurement."""
 
+import asyncio
+import hashlib
+
 from ragas import evaluate as ragas_evaluate
 from ragas.metrics import (
     faithfulness,
@@ -8,77 +11,249 @@ from ragas.metrics import (
     context_recall,
     context_entity_recall,
 )
-from ragas.llms import LangchainLLMWrapper
+from ragas.llms import BaseRagasLLM, LangchainLLMWrapper
+from ragas.run_config import RunConfig
 from langchain_anthropic import ChatAnthropic
+from langchain_core.outputs import Generation, LLMResult
 from datasets import Dataset
 
-from config import ANTHROPIC_API_KEY
+from config import ANTHROPIC_API_KEY, CLAUDE_MODEL
+from services import batch_api
+from services import _judge_cache as judge_cache
+from services._judge_cache import judge_key
 
 
 def _get_llm():
+    """Fresh judge wrapper per evaluation.
+
+    Not cached: ragas.evaluate drives every call on an event loop of its own
+    (always inside a worker thread here), and ChatAnthropic's async HTTP pool
+    is bound to the loop that first used it.
+    """
     return LangchainLLMWrapper(
-        ChatAnthropic(model="claude-sonnet-4-20250514", api_key=ANTHROPIC_API_KEY)
+        ChatAnthropic(model=CLAUDE_MODEL, api_key=ANTHROPIC_API_KEY)
     )
 
 
+def _row_key(ev: dict) -> str:
+    # judge_key folds in CLAUDE_MODEL and the cache version
+    return judge_key(
+        "ragas:row", ev["query"], ev["agent_response"], ev["retrieved_contexts"], ev.get("ground_truth")
+    )
+
+
+def _evaluate_rows(
+    evaluations: list[dict],
+    llm: BaseRagasLLM | None = None,
+    max_workers: int = 16,
+    force_refresh: bool = False,
+) -> list[dict | Exception]:
+    """
+    Score rows with one ragas.evaluate call per metric set instead of one per row.
+    Returns per-row scores (or the exception that failed the row), in input order.
+    Complete score sets are cached; force_refresh=True bypasses the cache.
+    """
+    outcomes: list[dict | Exception | None] = [None] * len(evaluations)
+
+    # Rows with ground truth get two extra metrics and need the ground_truth column
+    groups: dict[bool, list[int]] = {False: [], True: []}
+    for i, ev in enumerate(evaluations):
+        hit = None if force_refresh else judge_cache.get(_row_key(ev))
+        if hit is not None:
+            outcomes[i] = hit
+        else:
+            groups[bool(ev.get("ground_truth"))].append(i)
+
+    for has_ground_truth, idx in groups.items():
+        if not idx:
+            continue
+        rows = [evaluations[i] for i in idx]
+        data = {
+            "question": [ev["query"] for ev in rows],
+            "answer": [ev["agent_response"] for ev in rows],
+            "contexts": [ev["retrieved_contexts"] for ev in rows],
+        }
+        metrics = [faithfulness, answer_relevancy, context_precision]
+        if has_ground_truth:
+            data["ground_truth"] = [ev["ground_truth"] for ev in rows]
+            metrics.append(context_recall)
+            metrics.append(context_entity_recall)
+
+        try:
+            result = ragas_evaluate(
+                dataset=Dataset.from_dict(data),
+                metrics=metrics,
+                llm=llm or _get_llm(),
+                run_config=RunConfig(max_workers=max_workers),
+            )
+        except Exception as e:
+            for i in idx:
+                outcomes[i] = e
+            continue
+
+        for i, row_scores in zip(idx, result.scores):
+            scores = {
+                name: round(float(val), 4) if val is not None else 0.0
+                for name, val in row_scores.items()
+            }
+            judge_cache.put(_row_key(evaluations[i]), "ragas", scores)
+            outcomes[i] = scores
+
+    return outcomes
+
+
+def _batch_results(evaluations: list[dict], outcomes: list[dict | Exception]) -> list[dict]:
+    results = []
+    for ev, scores in zip(evaluations, outcomes):
+        if isinstance(scores, Exception):
+            results.append({"query": ev["query"], "scores": {}, "success": False, "error": str(scores)})
+        else:
+            results.append({"query": ev["query"], "scores": scores, "success": True})
+    return results
+
+
 def evaluate_with_ragas(
     query: str,
     retrieved_contexts: list[str],
     agent_response: str,
     ground_truth: str | None = None,
+    llm: BaseRagasLLM | None = None,
+    force_refresh: bool = False,
 ) -> dict:
     """
     Run RAGAS evaluation on a single RAG interaction.
-    Returns per-metric scores.
+    Returns per-metric scores; complete score sets are cached (force_refresh=True to bypass).
     """
-    data = {
-        "question": [query],
-        "answer": [agent_response],
-        "contexts": [retrieved_contexts],
+    ev = {
+        "query": query,
+        "retrieved_contexts": retrieved_contexts,
+        "agent_response": agent_response,
+        "ground_truth": ground_truth,
     }
-    if ground_truth:
-        data["ground_truth"] = [ground_truth]
+    (outcome,) = _evaluate_rows([ev], llm=llm, force_refresh=force_refresh)
+    if isinstance(outcome, Exception):
+        raise outcome
+    return outcome
 
-    dataset = Dataset.from_dict(data)
 
-    metrics = [faithfulness, answer_relevancy, context_precision]
-    if ground_truth:
-        metrics.append(context_recall)
-        metrics.append(context_entity_recall)
+async def batch_evaluate_with_ragas_async(
+    evaluations: list[dict],
+    max_concurrency: int = 16,
+    qpm: int | None = None,
+) -> list[dict]:
+    """
+    Run RAGAS on a batch of evaluations as one dataset, off the event loop.
+    max_concurrency caps RAGAS' in-flight judge calls; qpm optionally caps rows started per minute.
+    """
+    limiter = None
+    if qpm:
+        try:
+            from aiolimiter import AsyncLimiter
 
-    llm = _get_llm()
+            limiter = AsyncLimiter(qpm, 60)
+        except ImportError:
+            print("[RAGAS] aiolimiter not installed — running batch without a qpm limit")
 
-    result = ragas_evaluate(
-        dataset=dataset,
-        metrics=metrics,
-        llm=llm,
-    )
+    # Rate-limited runs go out in chunks of at most qpm rows, each admitted by the limiter
+    chunk_size = qpm if limiter else max(len(evaluations), 1)
+    outcomes = []
+    for start in range(0, len(evaluations), chunk_size):
+        rows = evaluations[start : start + chunk_size]
+        if limiter:
+            await limiter.acquire(len(rows))
+        outcomes += await asyncio.to_thread(_evaluate_rows, rows, max_workers=max_concurrency)
+    return _batch_results(evaluations, outcomes)
 
-    scores = {}
-    for metric_name in result.scores[0]:
-        val = result.scores[0][metric_name]
-        scores[metric_name] = round(float(val), 4) if val is not None else 0.0
 
-    return scores
+class _BatchReplayLLM(BaseRagasLLM):
+    """RAGAS LLM that answers from Message Batches results and records every prompt it can't.
+
+    Judge prompts build on earlier answers (e.g. faithfulness extracts
+    statements, then verifies them), so a batch run replays RAGAS in rounds:
+    each round records the prompts it is missing, those go out as one batch,
+    and the next round gets one step further.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.responses: dict[str, str | None] = {}
+        self.pending: dict[str, dict] = {}
+
+    def is_finished(self, response: LLMResult) -> bool:
+        return True
+
+    def _complete(self, prompt, n: int, temperature: float | None, stop) -> LLMResult:
+        text = prompt.to_string()
+        if temperature is None:
+            temperature = self.get_temperature(n)
+        keys = [
+            hashlib.blake2b(f"{i}|{temperature}|{stop}|{text}".encode(), digest_size=16).hexdigest()
+            for i in range(n)
+        ]
+        missing = [k for k in keys if k not in self.responses]
+        if missing:
+            params = {
+                "model": CLAUDE_MODEL,
+                "max_tokens": 1024,
+                "temperature": temperature,
+                "messages": [{"role": "user", "content": text}],
+            }
+            if stop:
+                params["stop_sequences"] = stop
+            for key in missing:
+                self.pending[key] = {"custom_id": key, "params": params}
+            raise LookupError("judge response not in batch results yet")
+        if any(self.responses[k] is None for k in keys):
+            raise RuntimeError("batch request for judge prompt failed")
+        generations = [Generation(text=self.responses[k]) for k in keys]
+        return LLMResult(generations=[generations])
+
+    def generate_text(self, prompt, n=1, temperature=1e-8, stop=None, callbacks=None) -> LLMResult:
+        return self._complete(prompt, n, temperature, stop)
+
+    async def agenerate_text(self, prompt, n=1, temperature=None, stop=None, callbacks=None) -> LLMResult:
+        return self._complete(prompt, n, temperature, stop)
+
+    async def generate(self, prompt, n=1, temperature=None, stop=None, callbacks=None, is_async=True) -> LLMResult:
+        # No retry wrapper — a missing response won't appear until the next round
+        return self._complete(prompt, n, temperature, stop)
+
+
+def batch_evaluate_with_ragas_batch_api(
+    evaluations: list[dict],
+    max_rounds: int = 6,
+    poll_interval: float = 30.0,
+) -> list[dict]:
+    """
+    Run RAGAS on a batch of evaluations through the Message Batches API.
+    Slow (each round waits on a batch) but half the per-token cost — meant for offline sweeps.
+    """
+    llm = _BatchReplayLLM()
+    for round_no in range(max_rounds + 1):
+        results = _batch_results(evaluations, _evaluate_rows(evaluations, llm=llm))
+        if not llm.pending or round_no == max_rounds:
+            return results
+        requests = list(llm.pending.values())
+        llm.pending.clear()
+        batch_id = batch_api.submit_batch(requests)
+        batch_api.poll(batch_id, interval=poll_interval)
+        answers = batch_api.fetch_results(batch_id)
+        for r in requests:
+            llm.responses[r["custom_id"]] = answers.get(r["custom_id"])
+    return results
 
 
 def batch_evaluate_with_ragas(
     evaluations: list[dict],
+    max_concurrency: int = 16,
+    qpm: int | None = None,
+    use_batch_api: bool = False,
 ) -> list[dict]:
     """
     Run RAGAS on a batch of evaluations.
     Each item: {query, retrieved_contexts, agent_response, ground_truth?}
+    use_batch_api routes judge calls through the Message Batches API for offline runs.
     """
-    results = []
-    for ev in evaluations:
-        try:
-            scores = evaluate_with_ragas(
-                query=ev["query"],
-                retrieved_contexts=ev["retrieved_contexts"],
-                agent_response=ev["agent_response"],
-                ground_truth=ev.get("ground_truth"),
-            )
-            results.append({"query": ev["query"], "scores": scores, "success": True})
-        except Exception as e:
-            results.append({"query": ev["query"], "scores": {}, "success": False, "error": str(e)})
-    return results
+    if use_batch_api:
+        return batch_evaluate_with_ragas_batch_api(evaluations)
+    return asyncio.run(batch_evaluate_with_ragas_async(evaluations, max_concurrency, qpm))
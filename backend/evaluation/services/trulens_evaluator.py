@@ -1,74 +1,311 @@
 """TruLens feedback function evaluator."""
 
+import asyncio
+import hashlib
 import os
-import uuid
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
 from datetime import datetime, timezone
+from secrets import token_hex
 
+import orjson
+from cachetools import LRUCache, TTLCache
 from trulens.core import Feedback, TruSession
 from trulens.providers.litellm import LiteLLM
 
-from config import ANTHROPIC_API_KEY
+from config import ANTHROPIC_API_KEY, CLAUDE_MODEL, EVAL_COMBINED_JUDGE, EVAL_STORE_PATH, JUDGE_CACHE_TTL
+from services import _judge_cache as judge_cache
+from services._anthropic_client import get_async_client
+from services._judge_cache import cached
 
-# Store evaluations in memory (SQLite backing optional)
-_evaluations: list[dict] = []
+# Evaluations persist in SQLite; the indexes serve get_evaluations' filter + sort directly.
+# Timestamps are stored as epoch nanoseconds and only formatted when read.
+_db = sqlite3.connect(EVAL_STORE_PATH, check_same_thread=False)
+_db.executescript("""
+    PRAGMA journal_mode=WAL;
+    CREATE TABLE IF NOT EXISTS evaluations (
+        id TEXT PRIMARY KEY,
+        use_case TEXT NOT NULL,
+        agent_id TEXT,
+        timestamp_ns INTEGER NOT NULL,
+        payload TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_uc_ts ON evaluations (use_case, timestamp_ns DESC);
+    CREATE INDEX IF NOT EXISTS idx_ts ON evaluations (timestamp_ns DESC);
+""")
+_store_lock = threading.Lock()
+# Recent pages keyed by (limit, use_case) — cleared on every insert
+_recent_cache: LRUCache = LRUCache(maxsize=32)
+
+# Running score totals keyed by (use_case, metric); use_case None holds the overall totals
+_agg: defaultdict[tuple[str | None, str], dict] = defaultdict(lambda: {"sum": 0.0, "n": 0})
+_count = 0
+
+
+def _load_totals() -> None:
+    """Seed the running totals from evaluations already in the store."""
+    global _count
+    rows = _db.execute("""
+        SELECT e.use_case, json_extract(s.value, '$.metric'), SUM(json_extract(s.value, '$.score')), COUNT(*)
+        FROM evaluations e, json_each(e.payload, '$.scores') s
+        GROUP BY 1, 2
+        ORDER BY MIN(e.rowid)
+    """).fetchall()
+    for use_case, metric, total, n in rows:
+        for key in ((use_case, metric), (None, metric)):
+            _agg[key]["sum"] += total
+            _agg[key]["n"] += n
+    _count = _db.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+
+
+_load_totals()
+
+
+_provider = None
+_provider_lock = threading.Lock()
 
 
 def _get_provider():
-    """Get TruLens LLM provider for feedback functions."""
-    os.environ["ANTHROPIC_API_KEY"] = ANTHROPIC_API_KEY
-    return LiteLLM(model_engine="anthropic/claude-sonnet-4-20250514")
+    """Get the shared TruLens LLM provider for feedback functions."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                os.environ["ANTHROPIC_API_KEY"] = ANTHROPIC_API_KEY
+                _provider = LiteLLM(model_engine=f"anthropic/{CLAUDE_MODEL}")
+    return _provider
 
 
-def evaluate_rag(
+def reset_clients() -> None:
+    """Drop the cached provider so the next evaluation builds a fresh one."""
+    global _provider
+    with _provider_lock:
+        _provider = None
+
+
+# Feedback calls go through the judge cache — reruns on the same inputs skip the LLM
+
+@cached("trulens")
+def _relevance(query: str, response: str) -> float:
+    return float(_get_provider().relevance(query, response))
+
+
+@cached("trulens")
+def _context_relevance(query: str, context: str) -> float:
+    return float(_get_provider().context_relevance(query, context))
+
+
+# Retrieval often returns the same chunk for related queries — keep recent
+# (query, context) scores in memory ahead of the SQLite judge cache, expiring
+# on the same TTL.
+_ctx_memo: TTLCache = TTLCache(maxsize=10_000, ttl=JUDGE_CACHE_TTL)
+_ctx_memo_lock = threading.Lock()
+
+
+def _memo_context_relevance(query: str, context: str, force_refresh: bool = False) -> float:
+    key = (
+        hashlib.blake2b(query.encode(), digest_size=16).digest(),
+        hashlib.blake2b(context.encode(), digest_size=16).digest(),
+    )
+    if not force_refresh and JUDGE_CACHE_TTL > 0:
+        with _ctx_memo_lock:
+            hit = _ctx_memo.get(key)
+        if hit is not None:
+            return hit
+    score = _context_relevance(query, context, force_refresh=force_refresh)
+    with _ctx_memo_lock:
+        _ctx_memo[key] = score
+    return score
+
+
+@cached("trulens")
+def _groundedness(response: str, context_text: str) -> float:
+    grounded = _get_provider().groundedness_measure_with_cot_reasons(response, context_text)
+    # Returns (score, reasons); only the score is kept
+    return float(grounded[0] if isinstance(grounded, tuple) else grounded)
+
+
+@cached("trulens")
+def _coherence(response: str) -> float:
+    return float(_get_provider().coherence(response))
+
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_TOKEN = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _compact_context(agent_response: str, retrieved_contexts: list[str], max_sents: int = 20) -> str:
+    """Keep the max_sents context sentences that best match the response (BM25), in original order.
+
+    Groundedness only needs the evidence the response could draw on; the judge
+    re-reads every context token, so shorter input is cheaper and faster.
+    """
+    sentences = [
+        sent
+        for ctx in retrieved_contexts
+        for sent in _SENTENCE_SPLIT.split(ctx.strip())
+        if sent
+    ]
+    if len(sentences) <= max_sents:
+        return "\n---\n".join(retrieved_contexts)
+
+    query = _tokens(agent_response)
+    corpus = [_tokens(sent) for sent in sentences]
+    try:
+        from rank_bm25 import BM25Okapi
+
+        ranking = BM25Okapi(corpus).get_scores(query)
+    except ImportError:
+        # rank_bm25 not installed — rank by response-term overlap instead
+        terms = set(query)
+        ranking = [sum(tok in terms for tok in sent) for sent in corpus]
+
+    top = sorted(range(len(sentences)), key=lambda i: ranking[i], reverse=True)[:max_sents]
+    return "\n---\n".join(sentences[i] for i in sorted(top))
+
+
+# Combined judge — one Claude call scores all four metrics
+_COMBINED_JUDGE_SYSTEM = (
+    "You grade a RAG system's answer. Score each item from 0.0 (worst) to 1.0 (best):\n"
+    "- answer_relevance: how relevant the response is to the query\n"
+    "- context_relevance: for EACH numbered context, how relevant it is to the query\n"
+    "- groundedness: how fully the response's claims are supported by the evidence\n"
+    "- coherence: how logically coherent the response is\n"
+    'Return ONLY a JSON object: {"answer_relevance": x, "context_relevance": [x, ...], '
+    '"groundedness": x, "coherence": x} with one context_relevance entry per context, in order.'
+)
+
+
+async def _combined_judge(
+    query: str,
+    response: str,
+    contexts: list[str],
+    evidence: str,
+    force_refresh: bool = False,
+) -> tuple[float, list[float], float, float]:
+    """Score answer relevance, per-context relevance, groundedness and coherence in one call."""
+    key = judge_cache.judge_key("trulens:combined", query, response, contexts, evidence)
+    hit = None if force_refresh else judge_cache.get(key)
+    if hit is not None:
+        return tuple(hit)
+
+    numbered = "\n\n".join(f"[{i}] {ctx}" for i, ctx in enumerate(contexts, 1))
+    message = await get_async_client(ANTHROPIC_API_KEY).messages.create(
+        model=CLAUDE_MODEL,
+        max_tokens=300,
+        temperature=0.0,
+        system=_COMBINED_JUDGE_SYSTEM,
+        messages=[{
+            "role": "user",
+            "content": (
+                f"Query:\n{query}\n\nResponse:\n{response}\n\n"
+                f"Contexts:\n{numbered}\n\nEvidence for groundedness:\n{evidence}"
+            ),
+        }],
+    )
+    text = message.content[0].text
+    parsed = orjson.loads(text[text.index("{") : text.rindex("}") + 1])
+
+    def clamp(value) -> float:
+        return min(max(float(value), 0.0), 1.0)
+
+    ctx_scores = [clamp(v) for v in parsed["context_relevance"]]
+    if len(ctx_scores) != len(contexts):
+        raise ValueError(f"judge scored {len(ctx_scores)} contexts, expected {len(contexts)}")
+    result = (
+        clamp(parsed["answer_relevance"]),
+        ctx_scores,
+        clamp(parsed["groundedness"]),
+        clamp(parsed["coherence"]),
+    )
+    judge_cache.put(key, "trulens", list(result))
+    return result
+
+
+def _score(metric: str, outcome) -> dict:
+    """Score entry from a feedback result; failures score 0.0 with the error as details."""
+    try:
+        if isinstance(outcome, Exception):
+            raise outcome
+        return {"metric": metric, "score": float(outcome), "details": None}
+    except Exception as e:
+        return {"metric": metric, "score": 0.0, "details": str(e)}
+
+
+async def evaluate_rag_async(
     query: str,
     retrieved_contexts: list[str],
     agent_response: str,
     ground_truth: str | None = None,
     use_case: str = "general",
     agent_id: str = "unknown",
+    force_refresh: bool = False,
+    use_combined: bool | None = None,
 ) -> dict:
     """
     Run TruLens feedback functions on a single RAG interaction.
-    Returns evaluation_id and scores.
+    All feedback calls are issued concurrently. Returns evaluation_id and scores.
+    force_refresh bypasses cached judge results; use_combined (default
+    EVAL_COMBINED_JUDGE) scores every metric in a single judge call instead.
     """
-    provider = _get_provider()
-    evaluation_id = f"EVAL-{uuid.uuid4().hex[:12]}"
-    scores = []
+    evaluation_id = f"EVAL-{token_hex(12)}"
 
-    context_text = "\n---\n".join(retrieved_contexts) if retrieved_contexts else ""
+    context_text = _compact_context(agent_response, retrieved_contexts) if retrieved_contexts else ""
+    contexts = retrieved_contexts[:5]
+    # Duplicate chunks are judged once and fanned back out to their positions
+    unique_contexts = list(dict.fromkeys(contexts))
 
-    # 1. Answer Relevance — is the response relevant to the query?
-    try:
-        relevance = provider.relevance(query, agent_response)
-        scores.append({"metric": "answer_relevance", "score": float(relevance), "details": None})
-    except Exception as e:
-        scores.append({"metric": "answer_relevance", "score": 0.0, "details": str(e)})
+    combined = None
+    if EVAL_COMBINED_JUDGE if use_combined is None else use_combined:
+        try:
+            combined = await _combined_judge(
+                query, agent_response, unique_contexts, context_text, force_refresh
+            )
+        except Exception as e:
+            print(f"[TruLens] Combined judge failed, using per-metric feedback: {e}")
 
-    # 2. Context Relevance — are retrieved docs relevant to the query?
-    try:
-        ctx_scores = []
-        for ctx in retrieved_contexts[:5]:
-            s = provider.context_relevance(query, ctx)
-            ctx_scores.append(float(s))
-        avg_ctx = sum(ctx_scores) / len(ctx_scores) if ctx_scores else 0.0
-        scores.append({"metric": "context_relevance", "score": avg_ctx, "details": None})
-    except Exception as e:
-        scores.append({"metric": "context_relevance", "score": 0.0, "details": str(e)})
+    if combined is not None:
+        relevance, unique_outcomes, grounded, coherence = combined
+    else:
+        # Provider calls are blocking — one thread each, results come back in call order:
+        # answer relevance, context relevance per unique doc, groundedness, coherence
+        fresh = {"force_refresh": force_refresh}
+        outcomes = await asyncio.gather(
+            asyncio.to_thread(_relevance, query, agent_response, **fresh),
+            *(asyncio.to_thread(_memo_context_relevance, query, ctx, **fresh) for ctx in unique_contexts),
+            asyncio.to_thread(_groundedness, agent_response, context_text, **fresh),
+            asyncio.to_thread(_coherence, agent_response, **fresh),
+            return_exceptions=True,
+        )
+        relevance, *unique_outcomes, grounded, coherence = outcomes
+    by_context = dict(zip(unique_contexts, unique_outcomes))
+    ctx_outcomes = [by_context[ctx] for ctx in contexts]
 
-    # 3. Groundedness — is the response supported by context?
-    try:
-        grounded = provider.groundedness_measure_with_cot_reasons(agent_response, context_text)
-        g_score = grounded[0] if isinstance(grounded, tuple) else float(grounded)
-        scores.append({"metric": "groundedness", "score": float(g_score), "details": None})
-    except Exception as e:
-        scores.append({"metric": "groundedness", "score": 0.0, "details": str(e)})
+    # Context relevance — any failed doc fails the metric, as before
+    ctx_error = next((o for o in ctx_outcomes if isinstance(o, Exception)), None)
+    if ctx_error is not None:
+        context_score = _score("context_relevance", ctx_error)
+    else:
+        try:
+            ctx_scores = [float(o) for o in ctx_outcomes]
+            avg_ctx = sum(ctx_scores) / len(ctx_scores) if ctx_scores else 0.0
+        except Exception as e:
+            avg_ctx = e
+        context_score = _score("context_relevance", avg_ctx)
 
-    # 4. Coherence — is the reasoning logically coherent?
-    try:
-        coherence = provider.coherence(agent_response)
-        scores.append({"metric": "coherence", "score": float(coherence), "details": None})
-    except Exception as e:
-        scores.append({"metric": "coherence", "score": 0.0, "details": str(e)})
+    scores = [
+        _score("answer_relevance", relevance),
+        context_score,
+        _score("groundedness", grounded),
+        _score("coherence", coherence),
+    ]
 
     result = {
         "evaluation_id": evaluation_id,
@@ -79,24 +316,134 @@ def evaluate_rag(
         "scores": scores,
         "use_case": use_case,
         "agent_id": agent_id,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "timestamp_ns": time.time_ns(),
     }
 
-    _evaluations.append(result)
+    await asyncio.to_thread(_record, result)
     return result
 
 
+def _record(result: dict) -> None:
+    """Persist an evaluation and fold its scores into the running totals."""
+    global _count
+    with _store_lock:
+        _db.execute(
+            "INSERT INTO evaluations (id, use_case, agent_id, timestamp_ns, payload) VALUES (?, ?, ?, ?, ?)",
+            (result["evaluation_id"], result["use_case"], result["agent_id"], result["timestamp_ns"],
+             orjson.dumps(result).decode()),
+        )
+        _db.commit()
+        _recent_cache.clear()
+        _count += 1
+        for sc in result["scores"]:
+            for key in ((result["use_case"], sc["metric"]), (None, sc["metric"])):
+                bucket = _agg[key]
+                bucket["sum"] += sc["score"]
+                bucket["n"] += 1
+
+
+def evaluate_rag(
+    query: str,
+    retrieved_contexts: list[str],
+    agent_response: str,
+    ground_truth: str | None = None,
+    use_case: str = "general",
+    agent_id: str = "unknown",
+    force_refresh: bool = False,
+    use_combined: bool | None = None,
+) -> dict:
+    """Sync evaluate_rag_async for callers outside an event loop."""
+    return asyncio.run(evaluate_rag_async(
+        query, retrieved_contexts, agent_response, ground_truth, use_case, agent_id,
+        force_refresh, use_combined,
+    ))
+
+
+def format_timestamp(timestamp_ns: int) -> str:
+    """ISO-8601 UTC string for an epoch-nanosecond timestamp."""
+    seconds, ns = divmod(timestamp_ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(microsecond=ns // 1_000).isoformat()
+
+
 def get_evaluations(limit: int = 50, use_case: str | None = None) -> list[dict]:
     """Get recent evaluations, optionally filtered by use case."""
-    evals = _evaluations
-    if use_case:
-        evals = [e for e in evals if e["use_case"] == use_case]
-    return sorted(evals, key=lambda e: e["timestamp"], reverse=True)[:limit]
+    key = (limit, use_case or None)
+    with _store_lock:
+        evals = _recent_cache.get(key)
+        if evals is None:
+            if use_case:
+                rows = _db.execute(
+                    "SELECT timestamp_ns, payload FROM evaluations WHERE use_case = ? "
+                    "ORDER BY timestamp_ns DESC LIMIT ?",
+                    (use_case, limit),
+                )
+            else:
+                rows = _db.execute(
+                    "SELECT timestamp_ns, payload FROM evaluations ORDER BY timestamp_ns DESC LIMIT ?", (limit,)
+                )
+            evals = []
+            for timestamp_ns, payload in rows:
+                ev = orjson.loads(payload)
+                ev["timestamp"] = format_timestamp(timestamp_ns)
+                evals.append(ev)
+            _recent_cache[key] = evals
+    return evals
+
+
+# (dashboard alias, stored metric name) — aliases kept for backward compatibility
+_ALIASED_METRICS = (
+    ("answer_relevance", "answer_relevance"),
+    ("context_precision", "context_relevance"),
+    ("groundedness", "groundedness"),
+    ("faithfulness", "coherence"),
+)
+_BASE_METRICS = {m for _, m in _ALIASED_METRICS}
+
+
+def _accumulate() -> tuple[dict[str, list], dict[str, dict[str, list]]]:
+    """Snapshot the running totals as [sum, count] per metric, overall and per use case."""
+    overall: dict[str, list] = {}
+    by_use_case: dict[str, dict[str, list]] = {}
+    with _store_lock:
+        for (uc, metric), bucket in _agg.items():
+            totals = overall if uc is None else by_use_case.setdefault(uc, {})
+            totals[metric] = [bucket["sum"], bucket["n"]]
+    return overall, by_use_case
+
+
+def _summarize(totals: dict[str, list]) -> dict:
+    """Turn [sum, count] totals into rounded averages (aliased metrics + any extras)."""
+    def avg(metric):
+        total, n = totals.get(metric, (0.0, 0))
+        return round(total / n, 4) if n else 0.0
+
+    result = {alias: avg(m) for alias, m in _ALIASED_METRICS}
+    # Include all additional metrics (deepeval_*, ragas_*, etc.)
+    for m in totals:
+        if m not in _BASE_METRICS:
+            result[m] = avg(m)
+    return result
+
+
+def _summarize_by_use_case(by_use_case: dict[str, dict[str, list]]) -> dict:
+    leaderboard = {}
+    for uc, totals in by_use_case.items():
+        counted = totals.get("answer_relevance") or next(iter(totals.values()), (0.0, 0))
+        leaderboard[uc] = {**_summarize(totals), "count": counted[1]}
+    return leaderboard
+
+
+def get_leaderboard_aggregates() -> dict:
+    """Per-use-case metric averages."""
+    if not _count:
+        return {}
+    _, by_use_case = _accumulate()
+    return _summarize_by_use_case(by_use_case)
 
 
 def get_aggregate_metrics() -> dict:
     """Compute aggregate metrics across all evaluations (dynamic metric collection)."""
-    if not _evaluations:
+    if not _count:
         return {
             "answer_relevance": 0.0,
             "context_precision": 0.0,
@@ -106,55 +453,8 @@ def get_aggregate_metrics() -> dict:
             "by_use_case": {},
         }
 
-    # Dynamically collect all metric names from stored evaluations
-    metrics: dict[str, list[float]] = {}
-    by_use_case: dict[str, dict[str, list[float]]] = {}
-
-    for ev in _evaluations:
-        uc = ev["use_case"]
-        if uc not in by_use_case:
-            by_use_case[uc] = {}
-
-        for s in ev["scores"]:
-            m = s["metric"]
-            if m not in metrics:
-                metrics[m] = []
-            metrics[m].append(s["score"])
-            if m not in by_use_case[uc]:
-                by_use_case[uc][m] = []
-            by_use_case[uc][m].append(s["score"])
-
-    def avg(lst):
-        return sum(lst) / len(lst) if lst else 0.0
-
-    # Standard aliased metrics (backward compatible)
-    result = {
-        "answer_relevance": round(avg(metrics.get("answer_relevance", [])), 4),
-        "context_precision": round(avg(metrics.get("context_relevance", [])), 4),
-        "groundedness": round(avg(metrics.get("groundedness", [])), 4),
-        "faithfulness": round(avg(metrics.get("coherence", [])), 4),
-        "total_evaluations": len(_evaluations),
-    }
-
-    # Include all additional metrics (deepeval_*, ragas_*, etc.)
-    for m, values in metrics.items():
-        if m not in ("answer_relevance", "context_relevance", "groundedness", "coherence"):
-            result[m] = round(avg(values), 4)
-
-    result["by_use_case"] = {
-        uc: {
-            "answer_relevance": round(avg(scores.get("answer_relevance", [])), 4),
-            "context_precision": round(avg(scores.get("context_relevance", [])), 4),
-            "groundedness": round(avg(scores.get("groundedness", [])), 4),
-            "faithfulness": round(avg(scores.get("coherence", [])), 4),
-            "count": len(scores.get("answer_relevance", scores.get(next(iter(scores), ""), []))),
-            **{
-                m: round(avg(v), 4)
-                for m, v in scores.items()
-                if m not in ("answer_relevance", "context_relevance", "groundedness", "coherence")
-            },
-        }
-        for uc, scores in by_use_case.items()
-    }
-
+    overall, by_use_case = _accumulate()
+    result = _summarize(overall)
+    result["total_evaluations"] = _count
+    result["by_use_case"] = _summarize_by_use_case(by_use_case)
     return result
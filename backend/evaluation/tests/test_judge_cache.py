@@ -0,0 +1,19 @@
+"""Judge cache keys must change with the judge model and the cache version."""
+
+from services import _judge_cache as judge_cache
+
+
+def test_judge_key_depends_on_model(monkeypatch):
+    before = judge_cache.judge_key("trulens:_relevance", "q", "r")
+    monkeypatch.setattr(judge_cache, "CLAUDE_MODEL", "other-model")
+    assert judge_cache.judge_key("trulens:_relevance", "q", "r") != before
+
+
+def test_judge_key_depends_on_cache_version(monkeypatch):
+    before = judge_cache.judge_key("ragas:row", "q", "r", ["c"], None)
+    monkeypatch.setattr(judge_cache, "CACHE_VERSION", judge_cache.CACHE_VERSION + 1)
+    assert judge_cache.judge_key("ragas:row", "q", "r", ["c"], None) != before
+
+
+def test_judge_key_is_stable():
+    assert judge_cache.judge_key("m", "a", ["b", "c"]) == judge_cache.judge_key("m", "a", ["b", "c"])
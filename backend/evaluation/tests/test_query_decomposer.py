@@ -0,0 +1,142 @@
+"""Incremental sub-query parsing and the streaming decomposer iterators."""
+
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+
+import pytest
+
+from services import query_decomposer
+from services.query_decomposer import _StringArrayParser, decompose_query_async, iter_sub_queries
+
+COMPOUND_QUERY = "Find chargeback fraud cases and also list the related risk patterns"
+
+
+def _feed_in_chunks(text: str, size: int) -> list[str]:
+    parser = _StringArrayParser()
+    out = []
+    for i in range(0, len(text), size):
+        out += parser.feed(text[i:i + size])
+    return out
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_parser_plain_array(size):
+    assert _feed_in_chunks('["a b", "c"]', size) == ["a b", "c"]
+
+
+@pytest.mark.parametrize("size", [1, 2, 1000])
+def test_parser_escapes(size):
+    text = r'["say \"hi\"", "back\\slash", "tab\tnew\nline", "café"]'
+    assert _feed_in_chunks(text, size) == ['say "hi"', "back\\slash", "tab\tnew\nline", "café"]
+
+
+def test_parser_fenced_output():
+    text = 'Here you go:\n```json\n["first", "second"]\n```\nDone ["ignored"]'
+    parser = _StringArrayParser()
+    assert parser.feed(text) == ["first", "second"]
+    assert parser.done
+
+
+def test_parser_empty_array():
+    parser = _StringArrayParser()
+    assert parser.feed("[]") == []
+    assert parser.done
+
+
+def test_parser_bracket_inside_string():
+    parser = _StringArrayParser()
+    assert parser.feed('["ids [1, 2]", "x]"]') == ["ids [1, 2]", "x]"]
+    assert parser.done
+
+
+class _FakeStream:
+    def __init__(self, chunks):
+        self.text_stream = iter(chunks)
+
+
+class _FakeAsyncStream:
+    def __init__(self, chunks):
+        async def gen():
+            for chunk in chunks:
+                yield chunk
+
+        self.text_stream = gen()
+
+
+class _FakeMessages:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.calls = 0
+
+    @contextmanager
+    def stream(self, **params):
+        self.calls += 1
+        yield _FakeStream(self.chunks)
+
+
+class _FakeAsyncMessages(_FakeMessages):
+    @asynccontextmanager
+    async def stream(self, **params):
+        self.calls += 1
+        yield _FakeAsyncStream(self.chunks)
+
+
+class _FakeClient:
+    def __init__(self, messages):
+        self.messages = messages
+
+
+@pytest.fixture
+def fake_sync(monkeypatch):
+    def install(chunks):
+        messages = _FakeMessages(chunks)
+        monkeypatch.setattr(query_decomposer, "_get_client", lambda: _FakeClient(messages))
+        return messages
+
+    return install
+
+
+@pytest.fixture
+def fake_async(monkeypatch):
+    def install(chunks):
+        messages = _FakeAsyncMessages(chunks)
+        monkeypatch.setattr(query_decomposer, "_get_async_client", lambda: _FakeClient(messages))
+        return messages
+
+    return install
+
+
+async def _collect(agen) -> list[str]:
+    return [sq async for sq in agen]
+
+
+def test_iter_sub_queries_streams_elements(fake_sync):
+    fake_sync(['["chargeback ', 'fraud cases", "risk', ' patterns"]'])
+    assert list(iter_sub_queries(COMPOUND_QUERY)) == ["chargeback fraud cases", "risk patterns"]
+
+
+def test_iter_sub_queries_max_cutoff(fake_sync):
+    fake_sync(['["a", "b", ', '"c", "d"]'])
+    assert list(iter_sub_queries(COMPOUND_QUERY, max_sub_queries=2)) == ["a", "b"]
+
+
+def test_iter_sub_queries_empty_array_falls_back(fake_sync):
+    fake_sync(["[]"])
+    assert list(iter_sub_queries(COMPOUND_QUERY)) == [COMPOUND_QUERY]
+
+
+def test_iter_sub_queries_skips_claude_for_atomic_query(fake_sync):
+    messages = fake_sync(['["x"]'])
+    assert list(iter_sub_queries("chargeback fraud cases")) == ["chargeback fraud cases"]
+    assert messages.calls == 0
+    assert list(iter_sub_queries("chargeback fraud cases", force=True)) == ["x"]
+
+
+def test_decompose_query_async_max_cutoff(fake_async):
+    fake_async(['```json\n["a", ', '"b", "c"]\n```'])
+    assert asyncio.run(_collect(decompose_query_async(COMPOUND_QUERY, max_sub_queries=2))) == ["a", "b"]
+
+
+def test_decompose_query_async_empty_array_falls_back(fake_async):
+    fake_async(["[", "]"])
+    assert asyncio.run(_collect(decompose_query_async(COMPOUND_QUERY))) == [COMPOUND_QUERY]
@@ -0,0 +1,72 @@
+"""Retrieval metric tests — hit rate, MRR and NDCG against hand-computed values."""
+
+import math
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers.retrieval_eval import _IDCG, _compute_hit_rate, _compute_mrr, _compute_ndcg, router
+
+
+def _reference_ndcg(retrieved_ids, relevant_ids, k):
+    relevant = set(relevant_ids)
+    dcg = sum(1.0 / math.log2(i + 2) for i, rid in enumerate(retrieved_ids[:max(k, 0)]) if rid in relevant)
+    idcg = sum(1.0 / math.log2(i + 2) for i in range(max(min(k, len(relevant)), 0)))
+    return dcg / idcg if idcg else 0.0
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_hit_rate():
+    assert _compute_hit_rate(["a", "b", "c"], frozenset({"b", "x"})) == 0.5
+    assert _compute_hit_rate([], frozenset({"a"})) == 0.0
+    assert _compute_hit_rate(["a"], frozenset()) == 0.0
+
+
+def test_mrr():
+    assert _compute_mrr(["a", "b", "c"], frozenset({"c", "b"})) == 0.5
+    assert _compute_mrr(["a", "b"], frozenset({"x"})) == 0.0
+    assert _compute_mrr([], frozenset({"a"})) == 0.0
+
+
+@pytest.mark.parametrize(
+    "retrieved, relevant, k",
+    [
+        (["a", "b", "c", "d"], ["b", "d"], 5),
+        (["a", "b", "c", "d"], ["b", "d"], 2),
+        (["x", "y"], ["a", "b", "c"], 5),
+        (["a", "b", "c"], ["a", "b", "c"], 1),
+        ([f"d{i}" for i in range(2000)], [f"d{i}" for i in range(0, 2000, 3)], 1500),
+    ],
+)
+def test_ndcg_matches_reference(retrieved, relevant, k):
+    assert _compute_ndcg(retrieved, frozenset(relevant), k) == pytest.approx(_reference_ndcg(retrieved, relevant, k))
+
+
+def test_ndcg_perfect_ranking_is_one():
+    assert _compute_ndcg(["a", "b"], frozenset({"a", "b"}), 5) == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("k", [0, -1, -100])
+def test_ndcg_non_positive_k_scores_zero(k):
+    assert _compute_ndcg(["a", "b", "c"], frozenset({"a", "c"}), k) == 0.0
+
+
+def test_idcg_table_prefix_sums():
+    assert _IDCG[0] == 0.0
+    assert _IDCG[3] == pytest.approx(sum(1.0 / math.log2(i + 2) for i in range(3)))
+
+
+def test_endpoint_negative_k(client):
+    resp = client.post("/evaluate/retrieval", json={"retrieved_ids": ["a", "b"], "relevant_ids": ["a"], "k": -1})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["ndcg_at_k"] == 0.0
+    assert body["hit_rate"] == 1.0
+    assert body["mrr"] == 1.0
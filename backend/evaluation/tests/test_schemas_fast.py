@@ -0,0 +1,70 @@
+"""msgspec request structs must accept what the pydantic models accept, and fail like them."""
+
+import msgspec
+import pytest
+
+from models.schemas import IngestRequest
+from models.schemas_fast import BatchEvaluateRequestStruct, IngestRequestStruct, decode_error_detail
+
+_decoder = msgspec.json.Decoder(IngestRequestStruct, strict=False)
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        {"text": "t", "_id": "A", "riskScore": 0.4, "sellerId": "S"},
+        {"text": "t", "id": "A", "risk_score": 0.4, "seller_id": "S"},
+        {"text": "t", "id": "A", "risk_score": "0.4", "seller_id": "S"},
+        {"text": "t", "_id": "A", "id": "B", "riskScore": 0.4, "risk_score": 0.9, "sellerId": "S"},
+        {"text": "t", "riskScore": 0},
+    ],
+)
+def test_ingest_record_matches_pydantic(record):
+    body = msgspec.json.encode({"namespace": "ns", "records": [record]})
+    got = _decoder.decode(body).records[0]
+    want = IngestRequest.model_validate_json(body).records[0]
+    assert (got.id, got.risk_score, got.seller_id) == (want.id, want.risk_score, want.seller_id)
+
+
+def test_ingest_record_builtins_use_pinecone_keys():
+    body = b'{"namespace": "ns", "records": [{"text": "t", "id": "A", "seller_id": "S"}]}'
+    record = msgspec.to_builtins(_decoder.decode(body).records[0])
+    assert record == {"text": "t", "_id": "A", "sellerId": "S"}
+
+
+def _detail(body: bytes) -> list[dict]:
+    with pytest.raises(msgspec.DecodeError) as exc:
+        msgspec.json.Decoder(BatchEvaluateRequestStruct).decode(body)
+    return decode_error_detail(exc.value)
+
+
+def test_decode_error_detail_type_error_location():
+    body = (
+        b'{"evaluations": [{"query": "q", "retrieved_contexts": ["c", 3], '
+        b'"agent_response": "r", "use_case": "u", "agent_id": "a"}]}'
+    )
+    assert _detail(body) == [{
+        "loc": ["body", "evaluations", 0, "retrieved_contexts", 1],
+        "msg": "Expected `str`, got `int`",
+        "type": "value_error",
+    }]
+
+
+def test_decode_error_detail_missing_field():
+    [error] = _detail(b'{"evaluations": [{"query": "q"}]}')
+    assert error["loc"] == ["body", "evaluations", 0, "retrieved_contexts"]
+    assert error["type"] == "missing"
+
+
+def test_decode_error_detail_malformed_json():
+    [error] = _detail(b"{")
+    assert error["loc"] == ["body"]
+    assert error["type"] == "json_invalid"
+
+
+def test_decode_error_detail_ingest_record():
+    with pytest.raises(msgspec.DecodeError) as exc:
+        _decoder.decode(b'{"namespace": "ns", "records": [{"text": "t", "riskScore": "high"}]}')
+    [error] = decode_error_detail(exc.value)
+    assert error["loc"] == ["body", "records", 0, "riskScore"]
+    assert error["type"] == "value_error"
@@ -4,6 +4,9 @@ import { Brain, Activity, Target, Shield, RefreshCw, TrendingUp, AlertTriangle,
 
 const EVAL_API = 'http://localhost:8000'
 
+// /metrics/evaluations streams NDJSON — one JSON record per line
+const parseNdjson = (text) => text.split('\n').filter(Boolean).map(line => JSON.parse(line))
+
 function ScoreCard({ title, score, icon: Icon, color, inverted = false }) {
   const displayScore = inverted ? 1 - score : score
   const pct = (displayScore * 100).toFixed(1)
@@ -40,12 +43,12 @@ export default function RAGEvaluation() {
       const [metricsRes, historyRes, evalsRes, experimentsRes] = await Promise.all([
         fetch(`${EVAL_API}/metrics`).then(r => r.json()).catch(() => null),
         fetch(`${EVAL_API}/metrics/history?limit=100`).then(r => r.json()).catch(() => null),
-        fetch(`${EVAL_API}/metrics/evaluations?limit=50`).then(r => r.json()).catch(() => null),
+        fetch(`${EVAL_API}/metrics/evaluations?limit=50`).then(r => r.ok ? r.text() : null).then(t => t === null ? null : parseNdjson(t)).catch(() => null),
         fetch(`${EVAL_API}/experiments/list/fraud-detection`).then(r => r.json()).catch(() => null),
       ])
       if (metricsRes?.success) setMetrics(metricsRes.data)
       if (historyRes?.success) setHistory(historyRes.data)
-      if (evalsRes?.success) setEvaluations(evalsRes.data)
+      if (evalsRes) setEvaluations(evalsRes)
       if (experimentsRes?.success) setExperiments(experimentsRes.experiments || [])
     } catch (e) {
       console.error('Failed to fetch eval data:', e)